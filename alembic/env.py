@@ -5,12 +5,17 @@ from sqlalchemy import pool
 from alembic import context
 
 # Import your models
-from app.database import Base
+from app.config import settings
+from app.database import Base, sync_database_url
 from app.models import *
 
 # this is the Alembic Config object
 config = context.config
 
+# Migrate the database the app is configured for (DATABASE_URL), not the
+# placeholder in alembic.ini; % is escaped for the ini-style interpolation
+config.set_main_option("sqlalchemy.url", sync_database_url(settings.database_url).replace("%", "%%"))
+
 # Interpret the config file for Python logging
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
@@ -0,0 +1,56 @@
+"""timestamps with time zone
+
+Revision ID: 7c3e9a1d5b20
+Revises: 
+Create Date: 2026-10-14 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e9a1d5b20'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("companies", "invoices", "expenses", "customs_logs")
+COLUMNS = ("created_at", "updated_at")
+
+
+def _columns_to_convert(timezone: bool):
+    """(table, column) pairs that exist and do not yet have the wanted time zone setting"""
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+    for table in TABLES:
+        if table not in existing:
+            # Tables created later by init_db already use the new definition
+            continue
+        for column in inspector.get_columns(table):
+            if column["name"] in COLUMNS and column["type"].timezone != timezone:
+                yield table, column["name"]
+
+
+def upgrade() -> None:
+    # Existing rows were stamped with naive datetime.utcnow() values
+    for table, column in list(_columns_to_convert(timezone=True)):
+        # Response schemas require both timestamps, so backfill any missing ones
+        op.execute(f"UPDATE {table} SET {column} = now() WHERE {column} IS NULL")
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE TIMESTAMP WITH TIME ZONE "
+            f"USING {column} AT TIME ZONE 'UTC'"
+        )
+        # Inserts now leave the timestamps to the database
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT now()")
+
+
+def downgrade() -> None:
+    for table, column in list(_columns_to_convert(timezone=False)):
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT")
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE TIMESTAMP WITHOUT TIME ZONE "
+            f"USING {column} AT TIME ZONE 'UTC'"
+        )
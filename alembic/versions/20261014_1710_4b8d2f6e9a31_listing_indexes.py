@@ -0,0 +1,53 @@
+"""listing indexes
+
+Revision ID: 4b8d2f6e9a31
+Revises: 7c3e9a1d5b20
+Create Date: 2026-10-14 17:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8d2f6e9a31'
+down_revision: Union[str, None] = '7c3e9a1d5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, table, columns), matching __table_args__ in app/models.py
+INDEXES = (
+    ("ix_expenses_company_date", "expenses", ["company_id", sa.text("date DESC")]),
+    ("ix_expenses_company_category_date", "expenses", ["company_id", "category", sa.text("date DESC")]),
+    ("ix_customs_company_importdate", "customs_logs", ["company_id", sa.text("import_date DESC")]),
+)
+
+
+def _existing_indexes():
+    """Table name -> index names, for the tables that already exist"""
+    inspector = sa.inspect(op.get_bind())
+    return {
+        table: {index["name"] for index in inspector.get_indexes(table)}
+        for table in inspector.get_table_names()
+    }
+
+
+def upgrade() -> None:
+    existing = _existing_indexes()
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and does not
+    # block writes to the tables while the index builds
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            # Tables created later by init_db get the indexes from the models
+            if table in existing and name not in existing[table]:
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    existing = _existing_indexes()
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            if name in existing.get(table, ()):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -1,31 +1,74 @@
-from sqlalchemy import create_engine
+from functools import lru_cache
+import orjson
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
-# Create database engine
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    echo=settings.environment == "development"
-)
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _async_database_url(url: str) -> str:
+    """Point plain PostgreSQL URLs (as provided by Railway) at the asyncpg driver"""
+    for prefix in ("postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def sync_database_url(url: str) -> str:
+    """Point PostgreSQL URLs at the psycopg2 driver, for synchronous tools such as Alembic"""
+    for prefix in ("postgresql+asyncpg://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg2://" + url[len(prefix):]
+    return url
+
+
+def _json_serializer(value) -> str:
+    """Serialize JSON columns (e.g. expense OCR data) with orjson"""
+    return orjson.dumps(value).decode()
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> AsyncEngine:
+    """Create the async database engine once per process"""
+    # Recycle connections instead of pinging them on every checkout
+    return create_async_engine(
+        _async_database_url(settings.database_url),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=False,
+        json_serializer=_json_serializer,
+        json_deserializer=orjson.loads,
+        echo=settings.environment == "development"
+    )
+
+
+# Create session factories
+SessionLocal = async_sessionmaker(bind=get_engine(), autoflush=False, expire_on_commit=False)
+# Read-only sessions share the pool but open READ ONLY transactions, so
+# PostgreSQL rejects any write made through them
+ReadOnlySessionLocal = async_sessionmaker(
+    bind=get_engine().execution_options(postgresql_readonly=True),
+    autoflush=False,
+    expire_on_commit=False
+)
 
 # Base class for models
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency to get async database session"""
+    async with SessionLocal() as db:
+        yield db
+
+
+async def get_db_readonly():
+    """Dependency to get a session for read-only endpoints (transactions are READ ONLY)"""
+    async with ReadOnlySessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def init_db():
+async def init_db():
     """Initialize database tables"""
-    Base.metadata.create_all(bind=engine)
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
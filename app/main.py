@@ -1,10 +1,11 @@
 from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse
 from app.routers import companies, invoices, expenses, customs, reconciliation
-from app.database import init_db
+from app.database import init_db, get_engine
+from app.middleware import FastCORSMiddleware
 from app.config import settings
+from contextlib import asynccontextmanager
 import os
 import logging
 
@@ -16,23 +17,43 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+
+async def _init_database():
+    """Create database tables, logging instead of failing startup"""
+    try:
+        await init_db()
+        logger.info("Database initialized successfully")
+    except Exception as e:
+        logger.error(f"Error initializing database: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize database on startup, release resources on shutdown"""
+    logger.info("Starting Cross-Border ERP System...")
+    logger.info(f"Environment: {settings.environment}")
+    await _init_database()
+    
+    yield
+    
+    logger.info("Shutting down Cross-Border ERP System...")
+    expenses.ocr_pool.shutdown(wait=False, cancel_futures=True)
+    await get_engine().dispose()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Cross-Border ERP System",
     description="SaaS ERP for Texas-México cross-border operations with OCR processing",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify allowed origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# CORS middleware (pure ASGI, headers built once)
+app.add_middleware(FastCORSMiddleware)  # In production, specify allowed origin
 
 # Include routers
 app.include_router(companies.router)
@@ -51,59 +72,51 @@ if os.path.exists(frontend_path):
 if os.path.exists(uploads_path):
     app.mount("/uploads", StaticFiles(directory=uploads_path), name="uploads")
 
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    logger.info("Starting Cross-Border ERP System...")
-    logger.info(f"Environment: {settings.environment}")
-    try:
-        init_db()
-        logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Error initializing database: {e}")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    logger.info("Shutting down Cross-Border ERP System...")
+# Resolve the dashboard once; the frontend does not change while running
+index_file = os.path.join(frontend_path, "index.html")
+index_path = index_file if os.path.exists(index_file) else None
+frontend_not_found = HTMLResponse(content="<h1>Cross-Border ERP System</h1><p>Frontend not found. Please check installation.</p>")
 
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Serve main dashboard"""
-    frontend_file = os.path.join(frontend_path, "index.html")
-    if os.path.exists(frontend_file):
-        return FileResponse(frontend_file)
-    return HTMLResponse(content="<h1>Cross-Border ERP System</h1><p>Frontend not found. Please check installation.</p>")
+    if index_path:
+        return FileResponse(index_path)
+    return frontend_not_found
+
+
+# Static JSON payloads are serialized once and the same response is reused
+health_response = ORJSONResponse({
+    "status": "healthy",
+    "environment": settings.environment,
+    "version": "1.0.0"
+})
+
+api_root_response = ORJSONResponse({
+    "message": "Cross-Border ERP API",
+    "version": "1.0.0",
+    "docs": "/api/docs",
+    "endpoints": {
+        "companies": "/api/companies",
+        "invoices": "/api/invoices",
+        "expenses": "/api/expenses",
+        "customs": "/api/customs",
+        "reconciliation": "/api/reconciliation"
+    }
+})
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint for Railway"""
-    return {
-        "status": "healthy",
-        "environment": settings.environment,
-        "version": "1.0.0"
-    }
+    return health_response
 
 
 @app.get("/api")
 async def api_root():
     """API root endpoint"""
-    return {
-        "message": "Cross-Border ERP API",
-        "version": "1.0.0",
-        "docs": "/api/docs",
-        "endpoints": {
-            "companies": "/api/companies",
-            "invoices": "/api/invoices",
-            "expenses": "/api/expenses",
-            "customs": "/api/customs",
-            "reconciliation": "/api/reconciliation"
-        }
-    }
+    return api_root_response
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+from typing import List, Optional, Tuple
+
+# Starlette's CORSMiddleware expands allow_methods=["*"] to this list
+ALL_METHODS = (b"DELETE", b"GET", b"HEAD", b"OPTIONS", b"PATCH", b"POST", b"PUT")
+
+
+class FastCORSMiddleware:
+    """
+    Pure ASGI CORS middleware with headers precomputed at startup
+
+    Behaves like Starlette's CORSMiddleware with allow_origins=["*"],
+    allow_credentials=True, allow_methods=["*"] and allow_headers=["*"]:
+    preflights echo the request origin and headers, and simple requests that
+    carry cookies get their origin echoed instead of "*".
+    """
+
+    def __init__(self, app, max_age: int = 600):
+        self.app = app
+        self._preflight_headers: List[Tuple[bytes, bytes]] = [
+            (b"vary", b"Origin"),
+            (b"access-control-allow-methods", b", ".join(ALL_METHODS)),
+            (b"access-control-max-age", str(max_age).encode()),
+            (b"access-control-allow-credentials", b"true"),
+        ]
+        self._simple_headers: List[Tuple[bytes, bytes]] = [
+            (b"access-control-allow-origin", b"*"),
+            (b"access-control-allow-credentials", b"true"),
+        ]
+        self._credentialed_headers: List[Tuple[bytes, bytes]] = [
+            (b"access-control-allow-credentials", b"true"),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin: Optional[bytes] = None
+        request_method: Optional[bytes] = None
+        request_headers: Optional[bytes] = None
+        has_cookie = False
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+            elif name == b"cookie":
+                has_cookie = True
+
+        # Same-origin and non-browser requests pass through untouched
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Answer preflight requests directly; other OPTIONS requests reach the app
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight(send, origin, request_method, request_headers)
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if has_cookie:
+                    # Credentialed requests must get their own origin back, not "*"
+                    _add_vary_origin(headers)
+                    headers.append((b"access-control-allow-origin", origin))
+                    headers.extend(self._credentialed_headers)
+                else:
+                    headers.extend(self._simple_headers)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    async def _preflight(self, send, origin: bytes, request_method: bytes, request_headers: Optional[bytes]):
+        """Send the preflight response, rejecting unknown methods like Starlette does"""
+        headers = self._preflight_headers + [(b"access-control-allow-origin", origin)]
+        if request_headers is not None:
+            headers.append((b"access-control-allow-headers", request_headers))
+
+        if request_method in ALL_METHODS:
+            status, body = 200, b"OK"
+        else:
+            status, body = 400, b"Disallowed CORS method"
+        headers += [
+            (b"content-length", str(len(body)).encode()),
+            (b"content-type", b"text/plain; charset=utf-8"),
+        ]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def _add_vary_origin(headers: List[Tuple[bytes, bytes]]) -> None:
+    """Add Origin to an existing Vary header, or add the header"""
+    for i, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            headers[i] = (name, value + b", Origin")
+            return
+    headers.append((b"vary", b"Origin"))
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from datetime import datetime
 from app.database import Base
 
@@ -13,8 +14,8 @@ class Company(Base):
     ein = Column(String(50), unique=True, nullable=False, index=True)  # US Tax ID
     texas_sales_tax_id = Column(String(50), nullable=True)
     rfc = Column(String(50), nullable=True, index=True)  # Mexico Tax ID
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     invoices = relationship("Invoice", back_populates="company", cascade="all, delete-orphan")
@@ -36,8 +37,8 @@ class Invoice(Base):
     currency = Column(String(3), default="USD")  # USD or MXN
     status = Column(String(50), default="pending")  # pending, paid, cancelled
     notes = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     company = relationship("Company", back_populates="invoices")
@@ -60,12 +61,18 @@ class Expense(Base):
     tax_amount = Column(Float, nullable=True)
     tip_amount = Column(Float, nullable=True)
     status = Column(String(50), default="pending")  # pending, approved, rejected
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     company = relationship("Company", back_populates="expenses")
     customs_logs = relationship("CustomsLog", back_populates="expense")
+    
+    # Match the list/reconciliation filters so results come back in index order
+    __table_args__ = (
+        Index("ix_expenses_company_date", company_id, date.desc()),
+        Index("ix_expenses_company_category_date", company_id, category, date.desc()),
+    )
 
 
 class CustomsLog(Base):
@@ -82,9 +89,14 @@ class CustomsLog(Base):
     currency = Column(String(3), default="USD")
     status = Column(String(50), default="in_process")  # in_process, cleared, held
     notes = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     company = relationship("Company", back_populates="customs_logs")
     expense = relationship("Expense", back_populates="customs_logs")
+    
+    # Match the list filter so results come back in index order
+    __table_args__ = (
+        Index("ix_customs_company_importdate", company_id, import_date.desc()),
+    )
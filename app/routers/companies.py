@@ -1,41 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from typing import List
-from app.database import get_db
+from app.database import get_db, get_db_readonly
 from app import models, schemas
 
 router = APIRouter(prefix="/api/companies", tags=["Companies"])
 
 
 @router.post("/", response_model=schemas.Company, status_code=status.HTTP_201_CREATED)
-def create_company(company: schemas.CompanyCreate, db: Session = Depends(get_db)):
+async def create_company(company: schemas.CompanyCreate, db: AsyncSession = Depends(get_db)):
     """Create a new company"""
-    # Check if EIN already exists
-    existing = db.query(models.Company).filter(models.Company.ein == company.ein).first()
-    if existing:
+    db_company = models.Company(**company.model_dump())
+    db.add(db_company)
+    
+    # EIN uniqueness is enforced by the database
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Company with this EIN already exists"
         )
-    
-    db_company = models.Company(**company.dict())
-    db.add(db_company)
-    db.commit()
-    db.refresh(db_company)
+    await db.refresh(db_company)
     return db_company
 
 
 @router.get("/", response_model=List[schemas.Company])
-def list_companies(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def list_companies(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db_readonly)):
     """List all companies"""
-    companies = db.query(models.Company).offset(skip).limit(limit).all()
+    result = await db.execute(select(models.Company).options(raiseload("*")).offset(skip).limit(limit))
+    companies = result.scalars().all()
     return companies
 
 
 @router.get("/{company_id}", response_model=schemas.Company)
-def get_company(company_id: int, db: Session = Depends(get_db)):
+async def get_company(company_id: int, db: AsyncSession = Depends(get_db_readonly)):
     """Get company by ID"""
-    company = db.query(models.Company).filter(models.Company.id == company_id).first()
+    company = await db.get(models.Company, company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -45,9 +50,9 @@ def get_company(company_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{company_id}", response_model=schemas.Company)
-def update_company(company_id: int, company_update: schemas.CompanyUpdate, db: Session = Depends(get_db)):
+async def update_company(company_id: int, company_update: schemas.CompanyUpdate, db: AsyncSession = Depends(get_db)):
     """Update company"""
-    company = db.query(models.Company).filter(models.Company.id == company_id).first()
+    company = await db.get(models.Company, company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -55,24 +60,24 @@ def update_company(company_id: int, company_update: schemas.CompanyUpdate, db: S
         )
     
     # Update fields
-    for key, value in company_update.dict(exclude_unset=True).items():
+    for key, value in company_update.model_dump(exclude_unset=True).items():
         setattr(company, key, value)
     
-    db.commit()
-    db.refresh(company)
+    await db.commit()
+    await db.refresh(company)
     return company
 
 
 @router.delete("/{company_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_company(company_id: int, db: Session = Depends(get_db)):
+async def delete_company(company_id: int, db: AsyncSession = Depends(get_db)):
     """Delete company"""
-    company = db.query(models.Company).filter(models.Company.id == company_id).first()
+    company = await db.get(models.Company, company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Company not found"
         )
     
-    db.delete(company)
-    db.commit()
+    await db.delete(company)
+    await db.commit()
     return None
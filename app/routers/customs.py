@@ -1,74 +1,97 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import bindparam, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from typing import List
-from app.database import get_db
+from app.database import get_db, get_db_readonly
 from app import models, schemas
 
 router = APIRouter(prefix="/api/customs", tags=["Customs"])
 
 
+def _list_statement(by_company: bool, by_status: bool):
+    """Build the list query for one combination of filters"""
+    query = select(models.CustomsLog).options(raiseload("*"))
+    
+    if by_company:
+        query = query.where(models.CustomsLog.company_id == bindparam("company_id"))
+    
+    if by_status:
+        query = query.where(models.CustomsLog.status == bindparam("status"))
+    
+    return query.order_by(models.CustomsLog.import_date.desc())
+
+
+# One prebuilt statement per filter combination, keyed by (company_id, status_filter) presence
+_LIST_STATEMENTS = {
+    (by_company, by_status): _list_statement(by_company, by_status)
+    for by_company in (False, True)
+    for by_status in (False, True)
+}
+
+
 @router.post("/", response_model=schemas.CustomsLog, status_code=status.HTTP_201_CREATED)
-def create_customs_log(log: schemas.CustomsLogCreate, db: Session = Depends(get_db)):
+async def create_customs_log(log: schemas.CustomsLogCreate, db: AsyncSession = Depends(get_db)):
     """Create a new customs log entry"""
     # Verify company exists
-    company = db.query(models.Company).filter(models.Company.id == log.company_id).first()
+    company = await db.get(models.Company, log.company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Company not found"
         )
     
-    # Check if pedimento number already exists
-    existing = db.query(models.CustomsLog).filter(
-        models.CustomsLog.pedimento_number == log.pedimento_number
-    ).first()
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Pedimento number already exists"
-        )
-    
     # Verify expense exists if provided
     if log.expense_id:
-        expense = db.query(models.Expense).filter(models.Expense.id == log.expense_id).first()
-        if not expense:
+        result = await db.execute(select(literal(1)).where(models.Expense.id == log.expense_id))
+        if result.scalar() is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Expense not found"
             )
     
-    db_log = models.CustomsLog(**log.dict())
+    db_log = models.CustomsLog(**log.model_dump())
     db.add(db_log)
-    db.commit()
-    db.refresh(db_log)
+    
+    # Pedimento number uniqueness is enforced by the database
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pedimento number already exists"
+        )
+    await db.refresh(db_log)
     return db_log
 
 
 @router.get("/", response_model=List[schemas.CustomsLog])
-def list_customs_logs(
+async def list_customs_logs(
     company_id: int = None,
     status_filter: str = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """List customs logs with optional filters"""
-    query = db.query(models.CustomsLog)
-    
-    if company_id:
-        query = query.filter(models.CustomsLog.company_id == company_id)
-    
-    if status_filter:
-        query = query.filter(models.CustomsLog.status == status_filter)
+    query = _LIST_STATEMENTS[(bool(company_id), bool(status_filter))]
     
-    logs = query.order_by(models.CustomsLog.import_date.desc()).offset(skip).limit(limit).all()
-    return logs
+    result = await db.execute(
+        query.offset(skip).limit(limit),
+        {"company_id": company_id, "status": status_filter}
+    )
+    logs = result.scalars().all()
+    # Serialize directly; response_model stays for the OpenAPI schema only
+    return ORJSONResponse([schemas.CustomsLog.from_orm_fast(row).model_dump(mode="json") for row in logs])
 
 
 @router.get("/{log_id}", response_model=schemas.CustomsLog)
-def get_customs_log(log_id: int, db: Session = Depends(get_db)):
+async def get_customs_log(log_id: int, db: AsyncSession = Depends(get_db_readonly)):
     """Get customs log by ID"""
-    log = db.query(models.CustomsLog).filter(models.CustomsLog.id == log_id).first()
+    log = await db.get(models.CustomsLog, log_id)
     if not log:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -78,13 +101,13 @@ def get_customs_log(log_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{log_id}", response_model=schemas.CustomsLog)
-def update_customs_log(
+async def update_customs_log(
     log_id: int,
     log_update: schemas.CustomsLogUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update customs log"""
-    log = db.query(models.CustomsLog).filter(models.CustomsLog.id == log_id).first()
+    log = await db.get(models.CustomsLog, log_id)
     if not log:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,24 +115,24 @@ def update_customs_log(
         )
     
     # Update fields
-    for key, value in log_update.dict(exclude_unset=True).items():
+    for key, value in log_update.model_dump(exclude_unset=True).items():
         setattr(log, key, value)
     
-    db.commit()
-    db.refresh(log)
+    await db.commit()
+    await db.refresh(log)
     return log
 
 
 @router.delete("/{log_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_customs_log(log_id: int, db: Session = Depends(get_db)):
+async def delete_customs_log(log_id: int, db: AsyncSession = Depends(get_db)):
     """Delete customs log"""
-    log = db.query(models.CustomsLog).filter(models.CustomsLog.id == log_id).first()
+    log = await db.get(models.CustomsLog, log_id)
     if not log:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customs log not found"
         )
     
-    db.delete(log)
-    db.commit()
+    await db.delete(log)
+    await db.commit()
     return None
@@ -1,24 +1,89 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_db_readonly
 from app import models, schemas
-from app.services.ocr_processor import OCRProcessor
-from app.services.file_handler import FileHandler
+from app.services.ocr_processor import ocr_processor, warm_up
+from app.services.file_handler import file_handler
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
 import logging
+import multiprocessing
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/expenses", tags=["Expenses"])
-ocr_processor = OCRProcessor()
-file_handler = FileHandler()
+
+
+def _new_ocr_pool() -> ProcessPoolExecutor:
+    """Create the OCR worker pool"""
+    # OCR is CPU-bound, so it runs in worker processes to keep the event loop free.
+    # Workers come from a forkserver rather than forking this threaded process,
+    # and each loads the language models once at startup, not on its first receipt
+    return ProcessPoolExecutor(
+        max_workers=settings.ocr_workers,
+        mp_context=multiprocessing.get_context("forkserver"),
+        initializer=warm_up
+    )
+
+
+ocr_pool = _new_ocr_pool()
+
+# Most recent OCR results by (upload digest, content type), so a re-uploaded
+# or retried receipt skips OCR entirely
+OCR_CACHE_SIZE = 256
+_ocr_cache: "OrderedDict[Tuple[str, str], Tuple[str, str, Dict]]" = OrderedDict()
+
+
+async def _run_ocr(file_path: str, content_type: str) -> Tuple[str, str, Dict]:
+    """Run OCR in the worker pool, replacing the pool once if a worker has died"""
+    global ocr_pool
+    loop = asyncio.get_running_loop()
+    pool = ocr_pool
+    try:
+        return await loop.run_in_executor(pool, ocr_processor.process, file_path, content_type)
+    except BrokenProcessPool:
+        # A killed or crashed worker breaks the executor for every later job
+        logger.error("OCR worker pool broke; restarting it and retrying")
+        if ocr_pool is pool:
+            ocr_pool = _new_ocr_pool()
+            pool.shutdown(wait=False, cancel_futures=True)
+        return await loop.run_in_executor(ocr_pool, ocr_processor.process, file_path, content_type)
+
+
+def _list_statement(by_company: bool, by_category: bool):
+    """Build the list query for one combination of filters"""
+    query = select(models.Expense).options(raiseload("*"))
+    
+    if by_company:
+        query = query.where(models.Expense.company_id == bindparam("company_id"))
+    
+    if by_category:
+        query = query.where(models.Expense.category == bindparam("category"))
+    
+    return query.order_by(models.Expense.date.desc())
+
+
+# One prebuilt statement per filter combination, keyed by (company_id, category) presence
+_LIST_STATEMENTS = {
+    (by_company, by_category): _list_statement(by_company, by_category)
+    for by_company in (False, True)
+    for by_category in (False, True)
+}
 
 
 @router.post("/upload", response_model=schemas.OCRResult)
 async def upload_receipt(
     file: UploadFile = File(...),
-    company_id: int = Form(...)
+    company_id: int = Form(...),
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """
     Upload receipt image/PDF and extract data via OCR
@@ -26,18 +91,31 @@ async def upload_receipt(
     The user can then review/edit before creating the expense
     """
     # Verify company exists
-    # Note: We can't use db dependency here because it's async
-    # In production, consider using async SQLAlchemy
+    company = await db.get(models.Company, company_id)
+    if not company:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Company not found"
+        )
+    # Return the connection to the pool now instead of holding it, idle in
+    # transaction, while the upload is streamed and OCR runs
+    await db.close()
     
     try:
-        # Save file and get bytes
-        file_path, file_bytes = await file_handler.save_file(file)
+        # Stream file to disk
+        file_path, digest = await file_handler.save_file(file)
         
-        # Process with OCR
-        raw_text, currency, extracted_fields = ocr_processor.process(
-            file_bytes,
-            file.content_type
-        )
+        cache_key = (digest, file.content_type)
+        cached = _ocr_cache.get(cache_key)
+        if cached is not None:
+            _ocr_cache.move_to_end(cache_key)
+            raw_text, currency, extracted_fields = cached
+        else:
+            # Process with OCR
+            raw_text, currency, extracted_fields = await _run_ocr(file_path, file.content_type)
+            _ocr_cache[cache_key] = (raw_text, currency, extracted_fields)
+            if len(_ocr_cache) > OCR_CACHE_SIZE:
+                _ocr_cache.popitem(last=False)
         
         # Determine confidence based on fields extracted
         extracted_count = len([v for v in extracted_fields.values() if v is not None])
@@ -55,6 +133,8 @@ async def upload_receipt(
             confidence=confidence
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing receipt: {e}")
         raise HTTPException(
@@ -64,48 +144,47 @@ async def upload_receipt(
 
 
 @router.post("/", response_model=schemas.Expense, status_code=status.HTTP_201_CREATED)
-def create_expense(expense: schemas.ExpenseCreate, db: Session = Depends(get_db)):
+async def create_expense(expense: schemas.ExpenseCreate, db: AsyncSession = Depends(get_db)):
     """Create a new expense (after OCR review)"""
     # Verify company exists
-    company = db.query(models.Company).filter(models.Company.id == expense.company_id).first()
+    company = await db.get(models.Company, expense.company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Company not found"
         )
     
-    db_expense = models.Expense(**expense.dict())
+    db_expense = models.Expense(**expense.model_dump())
     db.add(db_expense)
-    db.commit()
-    db.refresh(db_expense)
+    await db.commit()
+    await db.refresh(db_expense)
     return db_expense
 
 
 @router.get("/", response_model=List[schemas.Expense])
-def list_expenses(
+async def list_expenses(
     company_id: int = None,
     category: str = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """List expenses with optional filters"""
-    query = db.query(models.Expense)
-    
-    if company_id:
-        query = query.filter(models.Expense.company_id == company_id)
-    
-    if category:
-        query = query.filter(models.Expense.category == category)
+    query = _LIST_STATEMENTS[(bool(company_id), bool(category))]
     
-    expenses = query.order_by(models.Expense.date.desc()).offset(skip).limit(limit).all()
-    return expenses
+    result = await db.execute(
+        query.offset(skip).limit(limit),
+        {"company_id": company_id, "category": category}
+    )
+    expenses = result.scalars().all()
+    # Serialize directly; response_model stays for the OpenAPI schema only
+    return ORJSONResponse([schemas.Expense.from_orm_fast(row).model_dump(mode="json") for row in expenses])
 
 
 @router.get("/{expense_id}", response_model=schemas.Expense)
-def get_expense(expense_id: int, db: Session = Depends(get_db)):
+async def get_expense(expense_id: int, db: AsyncSession = Depends(get_db_readonly)):
     """Get expense by ID"""
-    expense = db.query(models.Expense).filter(models.Expense.id == expense_id).first()
+    expense = await db.get(models.Expense, expense_id)
     if not expense:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -115,13 +194,13 @@ def get_expense(expense_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{expense_id}", response_model=schemas.Expense)
-def update_expense(
+async def update_expense(
     expense_id: int,
     expense_update: schemas.ExpenseUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update expense (for manual corrections after OCR)"""
-    expense = db.query(models.Expense).filter(models.Expense.id == expense_id).first()
+    expense = await db.get(models.Expense, expense_id)
     if not expense:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -129,18 +208,18 @@ def update_expense(
         )
     
     # Update fields
-    for key, value in expense_update.dict(exclude_unset=True).items():
+    for key, value in expense_update.model_dump(exclude_unset=True).items():
         setattr(expense, key, value)
     
-    db.commit()
-    db.refresh(expense)
+    await db.commit()
+    await db.refresh(expense)
     return expense
 
 
 @router.delete("/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_expense(expense_id: int, db: Session = Depends(get_db)):
+async def delete_expense(expense_id: int, db: AsyncSession = Depends(get_db)):
     """Delete expense"""
-    expense = db.query(models.Expense).filter(models.Expense.id == expense_id).first()
+    expense = await db.get(models.Expense, expense_id)
     if not expense:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -153,6 +232,6 @@ def delete_expense(expense_id: int, db: Session = Depends(get_db)):
         # In production with Cloudinary, skip this
         pass
     
-    db.delete(expense)
-    db.commit()
+    await db.delete(expense)
+    await db.commit()
     return None
@@ -1,73 +1,96 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import bindparam, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+from typing import List, Tuple
 from datetime import datetime
-from app.database import get_db
+from decimal import Decimal, ROUND_HALF_UP
+from app.database import get_db, get_db_readonly
 from app import models, schemas
 from app.config import settings
 
 router = APIRouter(prefix="/api/invoices", tags=["Invoices"])
 
+# Texas Sales Tax rate (8.25% by default), resolved once at import
+_TAX_RATE = Decimal(str(settings.texas_sales_tax_rate))
+_CENT = Decimal("0.01")
+
+
+# Prebuilt list statements, keyed by whether a company filter is present
+_LIST_STATEMENTS = {
+    False: select(models.Invoice).options(raiseload("*")),
+    True: select(models.Invoice).options(raiseload("*")).where(
+        models.Invoice.company_id == bindparam("company_id")
+    ),
+}
+
+
+def _compute_tax(subtotal: float) -> Tuple[float, float]:
+    """Return (tax_amount, total) rounded to cents"""
+    amount = Decimal(str(subtotal))
+    tax = (amount * _TAX_RATE).quantize(_CENT, ROUND_HALF_UP)
+    total = (amount + tax).quantize(_CENT, ROUND_HALF_UP)
+    return float(tax), float(total)
+
 
 @router.post("/", response_model=schemas.Invoice, status_code=status.HTTP_201_CREATED)
-def create_invoice(invoice: schemas.InvoiceCreate, db: Session = Depends(get_db)):
+async def create_invoice(invoice: schemas.InvoiceCreate, db: AsyncSession = Depends(get_db)):
     """Create a new invoice with automatic tax calculation"""
     # Verify company exists
-    company = db.query(models.Company).filter(models.Company.id == invoice.company_id).first()
+    company = await db.get(models.Company, invoice.company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Company not found"
         )
     
-    # Check if invoice number already exists
-    existing = db.query(models.Invoice).filter(
-        models.Invoice.invoice_number == invoice.invoice_number
-    ).first()
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invoice number already exists"
-        )
-    
     # Calculate tax (Texas Sales Tax: 8.25%)
-    tax_amount = invoice.subtotal * settings.texas_sales_tax_rate
-    total = invoice.subtotal + tax_amount
+    tax_amount, total = _compute_tax(invoice.subtotal)
     
     # Create invoice
     db_invoice = models.Invoice(
-        **invoice.dict(),
-        tax_amount=round(tax_amount, 2),
-        total=round(total, 2)
+        **invoice.model_dump(),
+        tax_amount=tax_amount,
+        total=total
     )
     
     db.add(db_invoice)
-    db.commit()
-    db.refresh(db_invoice)
+    
+    # Invoice number uniqueness is enforced by the database
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invoice number already exists"
+        )
+    await db.refresh(db_invoice)
     return db_invoice
 
 
 @router.get("/", response_model=List[schemas.Invoice])
-def list_invoices(
+async def list_invoices(
     company_id: int = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """List invoices with optional company filter"""
-    query = db.query(models.Invoice)
-    
-    if company_id:
-        query = query.filter(models.Invoice.company_id == company_id)
+    query = _LIST_STATEMENTS[bool(company_id)]
     
-    invoices = query.offset(skip).limit(limit).all()
-    return invoices
+    result = await db.execute(query.offset(skip).limit(limit), {"company_id": company_id})
+    invoices = result.scalars().all()
+    # Serialize directly; response_model stays for the OpenAPI schema only
+    return ORJSONResponse([schemas.Invoice.from_orm_fast(row).model_dump(mode="json") for row in invoices])
 
 
 @router.get("/{invoice_id}", response_model=schemas.Invoice)
-def get_invoice(invoice_id: int, db: Session = Depends(get_db)):
+async def get_invoice(invoice_id: int, db: AsyncSession = Depends(get_db_readonly)):
     """Get invoice by ID"""
-    invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
+    invoice = await db.get(models.Invoice, invoice_id)
     if not invoice:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -77,47 +100,44 @@ def get_invoice(invoice_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{invoice_id}", response_model=schemas.Invoice)
-def update_invoice(
+async def update_invoice(
     invoice_id: int,
     invoice_update: schemas.InvoiceUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update invoice and recalculate tax if subtotal changed"""
-    invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
+    invoice = await db.get(models.Invoice, invoice_id)
     if not invoice:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Invoice not found"
         )
     
-    update_data = invoice_update.dict(exclude_unset=True)
+    update_data = invoice_update.model_dump(exclude_unset=True)
     
     # Recalculate tax if subtotal changed
     if 'subtotal' in update_data:
-        new_subtotal = update_data['subtotal']
-        tax_amount = new_subtotal * settings.texas_sales_tax_rate
-        update_data['tax_amount'] = round(tax_amount, 2)
-        update_data['total'] = round(new_subtotal + tax_amount, 2)
+        update_data['tax_amount'], update_data['total'] = _compute_tax(update_data['subtotal'])
     
     # Update fields
     for key, value in update_data.items():
         setattr(invoice, key, value)
     
-    db.commit()
-    db.refresh(invoice)
+    await db.commit()
+    await db.refresh(invoice)
     return invoice
 
 
 @router.delete("/{invoice_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_invoice(invoice_id: int, db: Session = Depends(get_db)):
+async def delete_invoice(invoice_id: int, db: AsyncSession = Depends(get_db)):
     """Delete invoice"""
-    invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
+    invoice = await db.get(models.Invoice, invoice_id)
     if not invoice:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Invoice not found"
         )
     
-    db.delete(invoice)
-    db.commit()
+    await db.delete(invoice)
+    await db.commit()
     return None
@@ -1,105 +1,159 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+from collections import defaultdict
+from typing import Dict, List, Tuple
 from datetime import datetime, timedelta
-from random import uniform, choice
-from app.database import get_db
+import numpy as np
+from app.database import get_db_readonly
 from app import models, schemas
 
 router = APIRouter(prefix="/api/reconciliation", tags=["Reconciliation"])
 
+_rng = np.random.default_rng()
+
 
 def generate_mock_bank_transactions(expenses: List[models.Expense]) -> List[schemas.BankTransaction]:
     """Generate mock bank transactions for demonstration"""
     transactions = []
+    n = len(expenses)
+    
+    # Draw all random values for the batch at once
+    # 70% chance of having a matching transaction
+    match_mask = _rng.random(n) < 0.7
+    # Add some variance to date (±2 days)
+    day_offsets = _rng.integers(-2, 3, n)
+    # Add some variance to amount (for testing matching logic)
+    variances = np.where(_rng.random(n) < 0.3, _rng.uniform(-0.5, 0.5, n), 0.0)
+    amounts = np.round(np.fromiter((e.amount for e in expenses), dtype=np.float64, count=n) + variances, 2)
     
     # Create matching transactions for some expenses
-    for expense in expenses:
-        # 70% chance of having a matching transaction
-        if uniform(0, 1) < 0.7:
-            # Add some variance to date (±2 days)
-            days_offset = choice([-2, -1, 0, 1, 2])
-            transaction_date = expense.date + timedelta(days=days_offset)
-            
-            # Add some variance to amount (for testing matching logic)
-            amount_variance = uniform(-0.5, 0.5) if uniform(0, 1) < 0.3 else 0
-            
-            transaction = schemas.BankTransaction(
-                transaction_id=f"TXN-{expense.id}-{abs(hash(str(expense.date)))}",
-                date=transaction_date,
-                description=expense.description[:50] if expense.description else "Purchase",
-                amount=round(expense.amount + amount_variance, 2),
-                currency=expense.currency
-            )
-            transactions.append(transaction)
+    for i in np.flatnonzero(match_mask).tolist():
+        expense = expenses[i]
+        transaction = schemas.BankTransaction(
+            transaction_id=f"TXN-{expense.id}-{int(expense.date.timestamp())}",
+            date=expense.date + timedelta(days=int(day_offsets[i])),
+            description=expense.description[:50] if expense.description else "Purchase",
+            amount=float(amounts[i]),
+            currency=expense.currency
+        )
+        transactions.append(transaction)
     
     # Add some unmatched transactions
+    unmatched_amounts = np.round(_rng.uniform(10, 200, 3), 2).tolist()
+    unmatched_currencies = _rng.choice(["USD", "MXN"], 3).tolist()
     for i in range(3):
         transaction = schemas.BankTransaction(
             transaction_id=f"TXN-UNMATCHED-{i}",
             date=datetime.utcnow() - timedelta(days=i),
             description=f"Unmatched Transaction {i+1}",
-            amount=round(uniform(10, 200), 2),
-            currency=choice(["USD", "MXN"])
+            amount=unmatched_amounts[i],
+            currency=unmatched_currencies[i]
         )
         transactions.append(transaction)
     
     return sorted(transactions, key=lambda x: x.date, reverse=True)
 
 
+# currency -> {date_ordinal: {amount_cents: [transaction indexes]}}
+AmountIndex = Dict[str, Dict[int, Dict[int, List[int]]]]
+# currency -> {date_ordinal: [transaction indexes]}
+DayIndex = Dict[str, Dict[int, List[int]]]
+
+
+def build_transaction_index(
+    transactions: List[schemas.BankTransaction]
+) -> Tuple[AmountIndex, DayIndex]:
+    """Bucket transactions by currency, day and amount so matching avoids a full scan"""
+    by_amount: AmountIndex = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+    by_day: DayIndex = defaultdict(lambda: defaultdict(list))
+    
+    for i, transaction in enumerate(transactions):
+        day = transaction.date.toordinal()
+        by_amount[transaction.currency][day][round(transaction.amount * 100)].append(i)
+        by_day[transaction.currency][day].append(i)
+    
+    return by_amount, by_day
+
+
 def match_expense_to_transaction(
     expense: models.Expense,
-    transactions: List[schemas.BankTransaction]
+    transactions: List[schemas.BankTransaction],
+    index: Tuple[AmountIndex, DayIndex],
+    matched: bytearray
 ) -> tuple:
     """
     Match an expense to a bank transaction
     Returns: (matching_transaction, confidence)
+    
+    Only the buckets that can satisfy the date/amount windows are probed.
+    Ties resolve as a scan in transaction order would: the first exact
+    match wins, otherwise the last likely match.
     """
-    best_match = None
-    best_confidence = "no_match"
+    by_amount, by_day = index
+    day = expense.date.toordinal()
     
-    for transaction in transactions:
-        # Check if already matched
-        if hasattr(transaction, '_matched'):
-            continue
-        
-        # Exact amount match within 2 days
-        if (abs((transaction.date - expense.date).days) <= 2 and
-            abs(transaction.amount - expense.amount) < 0.01 and
-            transaction.currency == expense.currency):
-            best_match = transaction
-            best_confidence = "exact"
-            transaction._matched = True
-            break
-        
-        # Likely match: close amount and date
-        if (abs((transaction.date - expense.date).days) <= 3 and
-            abs(transaction.amount - expense.amount) < 1.0 and
-            transaction.currency == expense.currency):
-            if best_confidence != "exact":
-                best_match = transaction
-                best_confidence = "likely"
+    # Exact amount match within 2 days (a 2-day timedelta spans at most 3 calendar days)
+    amount_buckets = by_amount.get(expense.currency)
+    if amount_buckets:
+        cents = round(expense.amount * 100)
+        best = -1
+        for d in range(day - 3, day + 4):
+            cents_buckets = amount_buckets.get(d)
+            if not cents_buckets:
+                continue
+            for c in range(cents - 1, cents + 2):
+                for i in cents_buckets.get(c, ()):
+                    # Check if already matched
+                    if matched[i] or (best != -1 and i > best):
+                        continue
+                    transaction = transactions[i]
+                    if (abs((transaction.date - expense.date).days) <= 2 and
+                        abs(transaction.amount - expense.amount) < 0.01):
+                        best = i
+        if best != -1:
+            matched[best] = 1
+            return transactions[best], "exact"
     
-    return best_match, best_confidence
+    # Likely match: close amount and date
+    day_buckets = by_day.get(expense.currency)
+    if day_buckets:
+        best = -1
+        for d in range(day - 4, day + 5):
+            for i in day_buckets.get(d, ()):
+                if matched[i] or i < best:
+                    continue
+                transaction = transactions[i]
+                if (abs((transaction.date - expense.date).days) <= 3 and
+                    abs(transaction.amount - expense.amount) < 1.0):
+                    best = i
+        if best != -1:
+            return transactions[best], "likely"
+    
+    return None, "no_match"
 
 
 @router.get("/", response_model=List[schemas.ReconciliationItem])
-def get_reconciliation(
+async def get_reconciliation(
     company_id: int,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """
     Get reconciliation view matching expenses with bank transactions
     This is a mockup using simulated bank data
     """
     # Get expenses for company
-    expenses = db.query(models.Expense).filter(
-        models.Expense.company_id == company_id
-    ).order_by(
-        models.Expense.date.desc()
-    ).offset(skip).limit(limit).all()
+    result = await db.execute(
+        select(models.Expense).options(raiseload("*")).where(
+            models.Expense.company_id == company_id
+        ).order_by(
+            models.Expense.date.desc()
+        ).offset(skip).limit(limit)
+    )
+    expenses = result.scalars().all()
     
     if not expenses:
         return []
@@ -108,9 +162,13 @@ def get_reconciliation(
     transactions = generate_mock_bank_transactions(expenses)
     
     # Match expenses to transactions
+    index = build_transaction_index(transactions)
+    matched = bytearray(len(transactions))
     reconciliation_items = []
     for expense in expenses:
-        matching_transaction, confidence = match_expense_to_transaction(expense, transactions)
+        matching_transaction, confidence = match_expense_to_transaction(
+            expense, transactions, index, matched
+        )
         
         item = schemas.ReconciliationItem(
             expense=expense,
@@ -1,10 +1,30 @@
-from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Literal, Optional
+from datetime import datetime, timezone
+
+
+# Validated by string equality rather than a regex
+Currency = Literal["USD", "MXN"]
+
+
+class BaseSchema(BaseModel):
+    """Base for all API schemas"""
+    
+    @classmethod
+    def from_orm_fast(cls, obj):
+        """Build from an ORM row without validation; column types are enforced by the database"""
+        return cls.model_construct(**{name: getattr(obj, name) for name in cls.model_fields})
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Convert offset-aware datetimes to naive UTC; business date columns are stored without a time zone"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 
 # ============ Company Schemas ============
-class CompanyBase(BaseModel):
+class CompanyBase(BaseSchema):
     name: str = Field(..., min_length=1, max_length=255)
     ein: str = Field(..., min_length=9, max_length=50)
     texas_sales_tax_id: Optional[str] = Field(None, max_length=50)
@@ -15,7 +35,7 @@ class CompanyCreate(CompanyBase):
     pass
 
 
-class CompanyUpdate(BaseModel):
+class CompanyUpdate(BaseSchema):
     name: Optional[str] = Field(None, min_length=1, max_length=255)
     texas_sales_tax_id: Optional[str] = Field(None, max_length=50)
     rfc: Optional[str] = Field(None, max_length=50)
@@ -26,25 +46,26 @@ class Company(CompanyBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============ Invoice Schemas ============
-class InvoiceBase(BaseModel):
+class InvoiceBase(BaseSchema):
     invoice_number: str = Field(..., max_length=100)
     date: datetime
     subtotal: float = Field(..., gt=0)
-    currency: str = Field(default="USD", pattern="^(USD|MXN)$")
+    currency: Currency = "USD"
     status: str = Field(default="pending")
     notes: Optional[str] = None
+    
+    _naive_date = field_validator("date")(to_naive_utc)
 
 
 class InvoiceCreate(InvoiceBase):
     company_id: int
 
 
-class InvoiceUpdate(BaseModel):
+class InvoiceUpdate(BaseSchema):
     subtotal: Optional[float] = Field(None, gt=0)
     status: Optional[str] = None
     notes: Optional[str] = None
@@ -58,20 +79,21 @@ class Invoice(InvoiceBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============ Expense Schemas ============
-class ExpenseBase(BaseModel):
+class ExpenseBase(BaseSchema):
     description: str = Field(..., min_length=1, max_length=500)
     amount: float = Field(..., gt=0)
-    currency: str = Field(default="USD", pattern="^(USD|MXN)$")
+    currency: Currency = "USD"
     date: datetime
     category: Optional[str] = Field(None, max_length=100)
     vendor: Optional[str] = Field(None, max_length=255)
     tax_amount: Optional[float] = None
     tip_amount: Optional[float] = None
+    
+    _naive_date = field_validator("date")(to_naive_utc)
 
 
 class ExpenseCreate(ExpenseBase):
@@ -80,10 +102,10 @@ class ExpenseCreate(ExpenseBase):
     ocr_data: Optional[dict] = None
 
 
-class ExpenseUpdate(BaseModel):
+class ExpenseUpdate(BaseSchema):
     description: Optional[str] = Field(None, min_length=1, max_length=500)
     amount: Optional[float] = Field(None, gt=0)
-    currency: Optional[str] = Field(None, pattern="^(USD|MXN)$")
+    currency: Optional[Currency] = None
     category: Optional[str] = None
     vendor: Optional[str] = None
     tax_amount: Optional[float] = None
@@ -94,18 +116,17 @@ class ExpenseUpdate(BaseModel):
 class Expense(ExpenseBase):
     id: int
     company_id: int
-    receipt_url: Optional[str]
-    ocr_data: Optional[dict]
+    receipt_url: Optional[str] = None
+    ocr_data: Optional[dict] = None
     status: str
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============ OCR Response Schema ============
-class OCRResult(BaseModel):
+class OCRResult(BaseSchema):
     raw_text: str
     detected_currency: str
     extracted_fields: dict
@@ -113,14 +134,16 @@ class OCRResult(BaseModel):
 
 
 # ============ Customs Log Schemas ============
-class CustomsLogBase(BaseModel):
+class CustomsLogBase(BaseSchema):
     pedimento_number: str = Field(..., max_length=100)
     bill_of_lading: Optional[str] = Field(None, max_length=100)
     import_date: datetime
     customs_value: float = Field(..., gt=0)
-    currency: str = Field(default="USD", pattern="^(USD|MXN)$")
+    currency: Currency = "USD"
     status: str = Field(default="in_process")
     notes: Optional[str] = None
+    
+    _naive_import_date = field_validator("import_date")(to_naive_utc)
 
 
 class CustomsLogCreate(CustomsLogBase):
@@ -128,7 +151,7 @@ class CustomsLogCreate(CustomsLogBase):
     expense_id: Optional[int] = None
 
 
-class CustomsLogUpdate(BaseModel):
+class CustomsLogUpdate(BaseSchema):
     bill_of_lading: Optional[str] = None
     customs_value: Optional[float] = Field(None, gt=0)
     status: Optional[str] = None
@@ -138,16 +161,15 @@ class CustomsLogUpdate(BaseModel):
 class CustomsLog(CustomsLogBase):
     id: int
     company_id: int
-    expense_id: Optional[int]
+    expense_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============ Reconciliation Schema ============
-class BankTransaction(BaseModel):
+class BankTransaction(BaseSchema):
     """Mock bank transaction for reconciliation"""
     transaction_id: str
     date: datetime
@@ -156,7 +178,7 @@ class BankTransaction(BaseModel):
     currency: str
 
 
-class ReconciliationItem(BaseModel):
+class ReconciliationItem(BaseSchema):
     expense: Expense
-    matching_transaction: Optional[BankTransaction]
+    matching_transaction: Optional[BankTransaction] = None
     match_confidence: str  # exact, likely, no_match
@@ -1,8 +1,12 @@
+import hashlib
 import os
 import uuid
-from typing import Tuple
+from pathlib import Path, PurePath
+import aiofiles
+import aiofiles.os
 from fastapi import UploadFile, HTTPException
 from app.config import settings
+from typing import Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,6 +20,7 @@ class FileHandler:
         'image/jpeg', 'image/jpg', 'image/png', 
         'image/gif', 'image/bmp', 'application/pdf'
     }
+    CHUNK_SIZE = 1024 * 1024  # 1MB
     
     def __init__(self):
         """Initialize file handler"""
@@ -23,9 +28,17 @@ class FileHandler:
         self.max_size = settings.max_upload_size
         
         # Create upload directory if it doesn't exist
-        os.makedirs(self.upload_dir, exist_ok=True)
+        self._dir = Path(self.upload_dir)
+        self._dir.mkdir(parents=True, exist_ok=True)
+    
+    def _too_large(self) -> HTTPException:
+        """Error for uploads over the size limit"""
+        return HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size: {self.max_size / 1024 / 1024}MB"
+        )
     
-    def validate_file(self, file: UploadFile) -> None:
+    def validate_file(self, file: UploadFile, file_ext: str) -> None:
         """Validate uploaded file"""
         # Check content type
         if file.content_type not in self.ALLOWED_CONTENT_TYPES:
@@ -35,55 +48,63 @@ class FileHandler:
             )
         
         # Check file extension
-        file_ext = os.path.splitext(file.filename)[1].lower()
         if file_ext not in self.ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=400,
                 detail=f"File extension not allowed. Allowed extensions: {', '.join(self.ALLOWED_EXTENSIONS)}"
             )
     
-    async def save_file(self, file: UploadFile) -> Tuple[str, bytes]:
+    async def save_file(self, file: UploadFile) -> Tuple[str, str]:
         """
-        Save uploaded file and return path and bytes
+        Stream uploaded file to disk in chunks, hashing it on the way
+        
+        The size limit is enforced while streaming, so an oversize upload
+        is rejected without being buffered in memory.
         
         Returns:
-            Tuple of (file_path, file_bytes)
+            Tuple of (file_path, content_digest)
         """
         # Validate file
-        self.validate_file(file)
+        file_ext = PurePath(file.filename).suffix.lower()
+        self.validate_file(file, file_ext)
         
-        # Read file bytes
-        file_bytes = await file.read()
-        
-        # Check file size
-        if len(file_bytes) > self.max_size:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Maximum size: {self.max_size / 1024 / 1024}MB"
-            )
+        # Reject on the size recorded while parsing the form, before writing anything
+        if file.size is not None and file.size > self.max_size:
+            raise self._too_large()
         
         # Generate unique filename
-        file_ext = os.path.splitext(file.filename)[1].lower()
-        unique_filename = f"{uuid.uuid4()}{file_ext}"
-        file_path = os.path.join(self.upload_dir, unique_filename)
+        file_path = str(self._dir / f"{uuid.uuid4()}{file_ext}")
         
         # Save file
+        size = 0
+        digest = hashlib.blake2b(digest_size=16)
         try:
-            with open(file_path, 'wb') as f:
-                f.write(file_bytes)
-            logger.info(f"File saved: {file_path}")
-            return file_path, file_bytes
+            async with aiofiles.open(file_path, 'wb') as f:
+                while chunk := await file.read(self.CHUNK_SIZE):
+                    size += len(chunk)
+                    # Check file size
+                    if size > self.max_size:
+                        raise self._too_large()
+                    digest.update(chunk)
+                    await f.write(chunk)
+        except HTTPException:
+            await self.delete_file(file_path)
+            raise
         except Exception as e:
             logger.error(f"Error saving file: {e}")
+            await self.delete_file(file_path)
             raise HTTPException(status_code=500, detail="Error saving file")
+        
+        logger.info(f"File saved: {file_path}")
+        return file_path, digest.hexdigest()
     
-    def delete_file(self, file_path: str) -> bool:
-        """Delete file from storage"""
+    async def delete_file(self, file_path: str) -> bool:
+        """Delete file from storage without blocking the event loop"""
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"File deleted: {file_path}")
-                return True
+            await aiofiles.os.remove(file_path)
+            logger.info(f"File deleted: {file_path}")
+            return True
+        except FileNotFoundError:
             return False
         except Exception as e:
             logger.error(f"Error deleting file: {e}")
@@ -94,3 +115,7 @@ class FileHandler:
         # For local storage, return relative path
         # In production with Cloudinary, this would return the Cloudinary URL
         return f"/uploads/{os.path.basename(file_path)}"
+
+
+# Shared instance; the upload directory is created once at import
+file_handler = FileHandler()
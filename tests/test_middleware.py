@@ -0,0 +1,51 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.middleware import FastCORSMiddleware
+
+
+async def endpoint(request):
+    headers = {"vary": "Accept-Encoding"} if request.url.path == "/vary" else None
+    return PlainTextResponse(f"{request.method} ok", headers=headers)
+
+
+def make_client(wrap) -> TestClient:
+    app = Starlette(routes=[
+        Route("/", endpoint, methods=["GET", "POST", "OPTIONS"]),
+        Route("/vary", endpoint),
+    ])
+    return TestClient(wrap(app))
+
+
+# The configuration the app used before the pure ASGI middleware
+starlette_client = make_client(lambda app: CORSMiddleware(
+    app, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"]
+))
+fast_client = make_client(FastCORSMiddleware)
+
+
+@pytest.mark.parametrize("method, path, headers", [
+    ("GET", "/", {}),
+    ("GET", "/", {"Origin": "https://app.example"}),
+    ("POST", "/", {"Origin": "https://app.example", "Cookie": "session=1"}),
+    ("GET", "/vary", {"Origin": "https://app.example", "Cookie": "session=1"}),
+    ("OPTIONS", "/", {"Origin": "https://app.example"}),
+    ("OPTIONS", "/", {}),
+    ("OPTIONS", "/", {"Origin": "https://app.example", "Access-Control-Request-Method": "PUT"}),
+    ("OPTIONS", "/", {
+        "Origin": "https://app.example",
+        "Access-Control-Request-Method": "POST",
+        "Access-Control-Request-Headers": "content-type, x-requested-with",
+    }),
+    ("OPTIONS", "/", {"Origin": "https://app.example", "Access-Control-Request-Method": "TRACE"}),
+])
+def test_matches_starlette_cors(method, path, headers):
+    expected = starlette_client.request(method, path, headers=headers)
+    actual = fast_client.request(method, path, headers=headers)
+    assert actual.status_code == expected.status_code
+    assert actual.content == expected.content
+    assert sorted(actual.headers.items()) == sorted(expected.headers.items())
@@ -0,0 +1,37 @@
+import io
+
+import pytest
+from PIL import Image, UnidentifiedImageError
+
+from app.services.ocr_processor import OCRProcessor
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    # Stub out Tesseract so only the preprocessing path is exercised
+    calls = []
+
+    def fake_ocr(self, image):
+        calls.append(image)
+        return "ACME STORE\nTotal: $12.50\nTax: $0.95\nThank you for shopping with us"
+
+    monkeypatch.setattr(OCRProcessor, "ocr_image", fake_ocr)
+    processor = OCRProcessor()
+    processor.calls = calls
+    return processor
+
+
+def test_non_image_bytes_reach_the_simple_fallback(processor):
+    # OpenCV cannot decode these, so the PIL fallback is the one that fails
+    with pytest.raises(UnidentifiedImageError):
+        processor.extract_text_from_image(b"not an image")
+    assert processor.calls == []
+
+
+def test_image_only_pil_can_decode_uses_the_simple_fallback(processor):
+    # OpenCV has no TGA decoder
+    buffer = io.BytesIO()
+    Image.new("L", (400, 200), color=255).save(buffer, format="TGA")
+    text = processor.extract_text_from_image(buffer.getvalue())
+    assert "Total: $12.50" in text
+    assert len(processor.calls) == 1
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from app import schemas
+
+
+def test_invoice_date_with_offset_is_stored_as_naive_utc():
+    invoice = schemas.InvoiceCreate.model_validate_json(
+        '{"company_id": 1, "invoice_number": "INV-1", "date": "2024-01-15T10:00:00-06:00", "subtotal": 100}'
+    )
+    assert invoice.date == datetime(2024, 1, 15, 16, 0)
+    assert invoice.date.tzinfo is None
+
+
+def test_expense_date_from_iso_string_is_stored_as_naive_utc():
+    # What JavaScript's Date.toISOString() sends
+    expense = schemas.ExpenseCreate.model_validate_json(
+        '{"company_id": 1, "description": "Lunch", "amount": 12.5, "date": "2024-01-15T10:00:00.000Z"}'
+    )
+    assert expense.date == datetime(2024, 1, 15, 10, 0)
+    assert expense.date.tzinfo is None
+
+
+def test_customs_import_date_keeps_naive_values():
+    log = schemas.CustomsLogCreate.model_validate_json(
+        '{"company_id": 1, "pedimento_number": "P-1", "import_date": "2024-01-15T10:00:00", "customs_value": 50}'
+    )
+    assert log.import_date == datetime(2024, 1, 15, 10, 0)